@@ -1,19 +1,117 @@
+import sqlite3
+
+import orjson
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from flask_caching import Cache
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine, make_url
 
 db = SQLAlchemy()
+cache = Cache()
+
+
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a writer commits; synchronous=NORMAL is safe under WAL
+    # and avoids an fsync per transaction. Applied once per physical connection.
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.close()
+
+class OrjsonProvider(JSONProvider):
+    """jsonify()/session JSON via orjson; types orjson can't encode fall back to Flask's default."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=DefaultJSONProvider.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+def _dedupe_match_assignments():
+    # one-off step before ux_ma_match_player exists on an existing database: drop the
+    # index it supersedes and keep only the latest assignment per (match, player) so
+    # the unique index can be built
+    if "ux_ma_match_player" in {ix["name"] for ix in inspect(db.engine).get_indexes("match_assignment")}:
+        return
+    db.session.execute(db.text("DROP INDEX IF EXISTS ix_ma_match_player"))
+    db.session.execute(db.text(
+        "DELETE FROM match_assignment WHERE id NOT IN "
+        "(SELECT MAX(id) FROM match_assignment GROUP BY match_id, player_id)"
+    ))
+    db.session.commit()
+
+def _create_missing_indexes():
+    # create_all() only builds indexes together with new tables; add any index declared
+    # on the models that an existing database doesn't have yet
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+def _migrate_match_status(MatchStatus):
+    # match.status used to be VARCHAR ('pending', 'locked', ...); rewrite any such rows
+    # to their SMALLINT MatchStatus value. A no-op once no legacy labels remain.
+    for status in MatchStatus:
+        db.session.execute(db.text("UPDATE match SET status = :value WHERE status = :label"),
+                           {"value": int(status), "label": status.label})
+    db.session.commit()
+
+def _add_team_skill_totals():
+    # team.skill_sum/skill_count were added after release: add them to an existing
+    # database and backfill them once from the stored skills
+    if "skill_count" in {c["name"] for c in inspect(db.engine).get_columns("team")}:
+        return
+    db.session.execute(db.text("ALTER TABLE team ADD COLUMN skill_sum INTEGER NOT NULL DEFAULT 0"))
+    db.session.execute(db.text("ALTER TABLE team ADD COLUMN skill_count INTEGER NOT NULL DEFAULT 0"))
+    db.session.execute(db.text(
+        "UPDATE team SET "
+        "skill_sum = (SELECT COALESCE(SUM(ps.value), 0) FROM player_skill ps JOIN player p ON p.id = ps.player_id WHERE p.team_id = team.id), "
+        "skill_count = (SELECT COUNT(ps.id) FROM player_skill ps JOIN player p ON p.id = ps.player_id WHERE p.team_id = team.id)"
+    ))
+    db.session.commit()
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__, template_folder="templates", static_folder="static")
     app.secret_key = "super_secret_key_change_me"
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///sports.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # keep a small set of long-lived connections so the PRAGMAs above and SQLite's page cache
+    # persist across requests instead of being rebuilt on every checkout
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        "pool_size": 8,
+        "max_overflow": 4,
+        "pool_recycle": 3600,
+        # compiled-statement cache per engine (default 500)
+        "query_cache_size": 1200,
+        "connect_args": {"check_same_thread": False, "timeout": 30},
+    }
     app.config['SECRET_KEY'] = 'dev-secret'
+    app.json = OrjsonProvider(app)
+    app.config['CACHE_TYPE'] = 'SimpleCache'
+    app.config['CACHE_DEFAULT_TIMEOUT'] = 60
+    if test_config:
+        app.config.update(test_config)
+    if make_url(app.config['SQLALCHEMY_DATABASE_URI']).database in (None, "", ":memory:"):
+        # in-memory SQLite gets a StaticPool, which takes no pool sizing arguments
+        for option in ("pool_size", "max_overflow", "pool_recycle"):
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'].pop(option, None)
     db.init_app(app)
+    cache.init_app(app)
 
     with app.app_context():
         # import routes (which imports models)
         from . import routes, models
         db.create_all()
+        _add_team_skill_totals()
+        _dedupe_match_assignments()
+        _create_missing_indexes()
+        _migrate_match_status(models.MatchStatus)
 
     return app
@@ -1,11 +1,53 @@
 from . import db
 from datetime import datetime
+from enum import IntEnum
+
+
+class MatchStatus(IntEnum):
+    """Match lifecycle states, stored as a SMALLINT."""
+    PENDING = 0
+    LOCKED = 1
+    COMPLETED = 2
+    VOID = 3
+
+    @property
+    def label(self):
+        return self.name.lower()
+
+    def __str__(self):
+        # templates render {{ match.status }} as the readable label
+        return self.label
+
+
+class MatchStatusType(db.TypeDecorator):
+    """SMALLINT column that round-trips MatchStatus; tolerates legacy string rows on read."""
+    impl = db.SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = MatchStatus[value.upper()]
+        return int(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            # pre-migration VARCHAR column: TEXT affinity keeps ints as digit strings
+            return MatchStatus(int(value)) if value.isdigit() else MatchStatus[value.upper()]
+        return MatchStatus(value)
 
 class Team(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     color = db.Column(db.String(30), nullable=True)
     skill_rating = db.Column(db.Integer, default=1200)
+    # running totals over the team's PlayerSkill values, shifted by each skill write,
+    # so the rating is skill_sum / skill_count without re-aggregating every skill
+    skill_sum = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    skill_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     sport = db.Column(db.String(50), nullable=True, default="soccer")
     captain_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=True)
@@ -30,6 +72,8 @@ class Player(db.Model):
     is_admin = db.Column(db.Boolean, default=False)
     skills = db.relationship("PlayerSkill", backref="player", lazy=True, cascade="all, delete-orphan")
 
+    __table_args__ = (db.Index('ix_player_team', 'team_id'),)
+
 class PlayerStats(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
@@ -53,6 +97,8 @@ class PlayerSkill(db.Model):
     name = db.Column(db.String(80), nullable=False)
     value = db.Column(db.Integer, nullable=False, default=0)
 
+    __table_args__ = (db.Index('ix_ps_player', 'player_id'),)
+
 
 class Match(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -62,12 +108,17 @@ class Match(db.Model):
     team1_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)
     team2_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)
     stakes = db.Column(db.Float, default=0.0)
-    status = db.Column(db.String(50), default="pending")
+    status = db.Column(MatchStatusType, default=MatchStatus.PENDING, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     team1 = db.relationship("Team", foreign_keys=[team1_id], lazy=True)
     team2 = db.relationship("Team", foreign_keys=[team2_id], lazy=True)
     winner_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=True)
 
+    # partial index covering the index page's open-challenge listing (filter + ORDER BY created_at)
+    __table_args__ = (
+        db.Index('ix_match_open', 'created_at', sqlite_where=db.text('team1_id IS NULL OR team2_id IS NULL')),
+    )
+
 
 
 class MatchAssignment(db.Model):
@@ -78,6 +129,10 @@ class MatchAssignment(db.Model):
     match = db.relationship("Match", backref=db.backref("assignments", cascade="all, delete-orphan"))
     player = db.relationship("Player", lazy=True)
 
+    # one assignment per player per match (upsert target); leading match_id also
+    # serves match-only filters (pool, lock, rebalance)
+    __table_args__ = (db.Index('ux_ma_match_player', 'match_id', 'player_id', unique=True),)
+
 
 class Invite(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -89,6 +144,8 @@ class Invite(db.Model):
     accepted = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (db.Index('ix_invite_ctx', 'context_type', 'context_id'),)
+
 
 # -------------------------
 # New: AdminSettings & Dispute Models
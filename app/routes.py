@@ -1,14 +1,23 @@
 from flask import current_app as app, render_template, request, redirect, url_for, flash, jsonify, abort
-from . import db
-from .models import Team, Player, Match, MatchAssignment, Invite, PlayerSkill, Dispute, AdminSettings
+from flask import make_response
+from markupsafe import Markup
+from . import db, cache
+from .models import Team, Player, Match, MatchAssignment, Invite, PlayerSkill, Dispute, AdminSettings, MatchStatus
 from .utils import shuffle_players_list, balance_teams, make_token
 from datetime import datetime
+from sqlalchemy import insert, update, delete, or_, exists, func
+from sqlalchemy.orm import selectinload, joinedload, raiseload
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from flask import session, redirect, url_for, flash
 from werkzeug.security import generate_password_hash, check_password_hash
-from functools import wraps
+from functools import wraps, lru_cache
 from .models import Admin
+import hashlib
 import json
 import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from .models import Team, Player, Match, PlayerStats
 from flask import request, redirect, url_for, flash
 from app import db
@@ -24,19 +33,60 @@ from app.ai_matchmaking import recommend_opponents, recommend_venues
 # -------------------------
 # Helper: sport -> skill fields
 # -------------------------
+_INT_RE = re.compile(r"\s*[+-]?\d+\s*")  # what int() accepts: surrounding whitespace, optional sign
+
+def _int_or_none(value):
+    """int(value) for integer form strings, else None; prechecks instead of raising on empty/invalid input."""
+    return int(value) if value and _INT_RE.fullmatch(value) else None
+
+_SKILL_MAPPING = {
+    "soccer": ("Shooting", "Passing", "Defending", "Speed", "Stamina"),
+    "basketball": ("Shooting", "Dribbling", "Defense", "Passing", "Rebounding"),
+    "volleyball": ("Serving", "Spiking", "Blocking", "Setting", "Passing"),
+    "hockey": ("Shooting", "Skating", "Defense", "Checking", "Passing"),
+    "football": ("Throwing", "Catching", "Tackling", "Speed", "Awareness"),
+    "cricket": ("Bowling", "Batting", "Fielding", "Speed", "Fitness"),
+    "default": ("Skill A", "Skill B", "Skill C", "Skill D", "Skill E")
+}
+
+@lru_cache(maxsize=32)
 def skill_fields_for_sport(sport):
-    mapping = {
-        "soccer": ["Shooting", "Passing", "Defending", "Speed", "Stamina"],
-        "basketball": ["Shooting", "Dribbling", "Defense", "Passing", "Rebounding"],
-        "volleyball": ["Serving", "Spiking", "Blocking", "Setting", "Passing"],
-        "hockey": ["Shooting", "Skating", "Defense", "Checking", "Passing"],
-        "football": ["Throwing", "Catching", "Tackling", "Speed", "Awareness"],
-        "cricket": ["Bowling", "Batting", "Fielding", "Speed", "Fitness"],
-        "default": ["Skill A", "Skill B", "Skill C", "Skill D", "Skill E"]
-    }
-    if not sport:
-        return mapping["default"]
-    return mapping.get(sport.lower(), mapping["default"])
+    # returns a shared tuple; callers must not mutate it
+    return _SKILL_MAPPING.get((sport or "").lower(), _SKILL_MAPPING["default"])
+
+_SKILL_PREFIX = "skill_"  # form fields: skill_<Name_With_Underscores>
+_SKILL_PREFIX_LEN = len(_SKILL_PREFIX)
+
+@lru_cache(maxsize=32)
+def skill_form_keys(sport):
+    # (skill name, form field) pairs, e.g. ("Skill A", "skill_Skill_A")
+    return tuple((sn, _SKILL_PREFIX + sn.replace(" ", "_")) for sn in skill_fields_for_sport(sport))
+
+@lru_cache(maxsize=32)
+def canonical_skill_keys(sport):
+    return frozenset(k for _, k in skill_form_keys(sport))
+
+def parse_skill_form(form, sport):
+    """
+    (name, value) pairs for the non-empty integer skill_* fields in one pass
+    over the form: the sport's canonical skills first, in their usual order,
+    then any arbitrary skill_ fields ("skill_Extra_Thing" -> "Extra Thing").
+    """
+    canonical_keys = canonical_skill_keys(sport)
+    canonical_values = {}
+    extra = []
+    for key, v_raw in form.items():
+        if key[:_SKILL_PREFIX_LEN] != _SKILL_PREFIX:
+            continue
+        # ignore empty/invalid entries
+        v = _int_or_none(v_raw)
+        if v is None:
+            continue
+        if key in canonical_keys:
+            canonical_values[key] = v
+        else:
+            extra.append((key[_SKILL_PREFIX_LEN:].replace("_", " "), v))
+    return [(sname, canonical_values[key]) for sname, key in skill_form_keys(sport) if key in canonical_values] + extra
 
 # -------------------------
 # Helper: recalculate team skill rating
@@ -44,49 +94,193 @@ def skill_fields_for_sport(sport):
 def recalc_team_skill(team):
     """
     Recalculate team's average skill rating as:
-    average of all PlayerSkill.value across all players in the team.
+    average of all PlayerSkill.value across all players in the team,
+    read from the team's running skill_sum/skill_count totals.
     If no PlayerSkill rows, fallback to average of player.skill_rating values
     or the default 1200.
+    Joins the caller's transaction: the caller commits and then calls
+    invalidate_team_caches(team.id).
     """
-    # collect all players on team
-    players = Player.query.filter_by(team_id=team.id).all()
-    total = 0
-    count = 0
-    for p in players:
-        # player skills
-        for s in p.skills:
-            # s.value is the model field
-            total += s.value
-            count += 1
-
-    if count > 0:
-        avg = total / count
-        team.skill_rating = int(round(avg))
-        db.session.add(team)
-        db.session.commit()
-        return team.skill_rating
-
-    # fallback: average player.skill_rating if present
-    if players:
-        sum_ratings = sum((p.skill_rating or 1200) for p in players)
-        team.skill_rating = int(round(sum_ratings / len(players)))
-        db.session.add(team)
-        db.session.commit()
-        return team.skill_rating
+    # totals are kept current by adjust_team_skill_totals: a primary-key read, not an aggregate
+    skill_sum, skill_count = db.session.query(Team.skill_sum, Team.skill_count).filter_by(id=team.id).one()
+    avg = skill_sum / skill_count if skill_count else None
+    if avg is None:
+        # fallback: average player.skill_rating if present (NULL when the team has no players)
+        avg = (db.session.query(func.avg(func.coalesce(Player.skill_rating, 1200)))
+               .filter(Player.team_id == team.id)
+               .scalar())
 
     # no players: leave default
-    team.skill_rating = team.skill_rating or 1200
-    db.session.add(team)
-    db.session.commit()
-    return team.skill_rating
+    rating = int(round(avg)) if avg is not None else (team.skill_rating or 1200)
+    if rating != team.skill_rating:
+        # only dirty the team (and write it on the caller's commit) when the rating moved
+        team.skill_rating = rating
+    return rating
+
+def adjust_team_skill_totals(team_id, delta_sum, delta_count):
+    """
+    Shift a team's running skill totals by the change a skill write made, in
+    the caller's transaction. Call it next to every PlayerSkill insert, value
+    update or delete for a player on a team.
+    """
+    if not team_id or not (delta_sum or delta_count):
+        return
+    db.session.execute(
+        update(Team)
+        .where(Team.id == team_id)
+        .values(skill_sum=Team.skill_sum + delta_sum, skill_count=Team.skill_count + delta_count)
+        .execution_options(synchronize_session=False)
+    )
+
+# -------------------------
+# Helper: debounced background team recalculation
+# -------------------------
+_recalc_executor = ThreadPoolExecutor(max_workers=2)
+_pending_recalcs = {}  # team_id -> Future
+# reentrant: a successful cancel() runs the done-callback (which takes this lock) inline
+_pending_recalcs_lock = threading.RLock()
+
+def _recalc_in_app_context(flask_app, team_id):
+    with flask_app.app_context():
+        try:
+            team = db.session.get(Team, team_id)
+            if team:
+                recalc_team_skill(team)
+                db.session.commit()
+        except Exception:
+            # nobody waits on the future, so log here or the failure is lost
+            db.session.rollback()
+            flask_app.logger.exception("Team skill recalculation failed for team %s", team_id)
+        finally:
+            # drop any page rendered with the old rating while this was pending
+            invalidate_team_caches(team_id)
+
+def schedule_team_recalc(team_id):
+    """
+    Run recalc_team_skill for a team on a worker thread so the request can
+    return immediately. A recalculation still queued for the same team is
+    cancelled, so a burst of edits costs one aggregation. Cached views are
+    invalidated now for the roster change and again once the rating lands.
+    """
+    invalidate_team_caches(team_id)
+    with _pending_recalcs_lock:
+        pending = _pending_recalcs.get(team_id)
+        if pending is not None:
+            pending.cancel()  # no-op if it already started
+        future = _recalc_executor.submit(_recalc_in_app_context, app._get_current_object(), team_id)
+        _pending_recalcs[team_id] = future
+
+    def _forget(f, team_id=team_id):
+        with _pending_recalcs_lock:
+            if _pending_recalcs.get(team_id) is f:
+                del _pending_recalcs[team_id]
+    future.add_done_callback(_forget)
+
+# -------------------------
+# Helper: players from a match's teams
+# -------------------------
+def _match_pool(match, *options):
+    """Players on the match's team1/team2, fetched with a single IN query."""
+    team_ids = [tid for tid in (match.team1_id, match.team2_id) if tid]
+    if not team_ids:
+        return []
+    return Player.query.options(*options).filter(Player.team_id.in_(team_ids)).all()
+
+def _rebalance_pool(match):
+    """
+    (id, name, skill_rating) rows for the balancing endpoints, which need nothing
+    else from Player; skips mapped-instance hydration. Falls back to every player
+    when the match's teams have none.
+    """
+    query = db.session.query(Player.id, Player.name, Player.skill_rating)
+    team_ids = [tid for tid in (match.team1_id, match.team2_id) if tid]
+    pool = query.filter(Player.team_id.in_(team_ids)).all() if team_ids else []
+    return pool or query.all()
+
+def _strict_loading():
+    """
+    raiseload('*') in debug, nothing otherwise. With it, a template that starts
+    reading a relationship the query didn't eager-load (say p.team or p.skills on
+    the match pool) raises instead of lazily issuing one SELECT per row. Only in
+    debug: in production the same slip should cost extra queries, not a 500.
+    """
+    return (raiseload('*'),) if app.debug else ()
+
+# -------------------------
+# Helper: cached team listing (index, create_match)
+# -------------------------
+@cache.memoize(60)
+def list_teams():
+    """
+    Plain dicts for the team pickers/listing, ordered by name.
+    Invalidated via invalidate_team_caches() whenever a team is created or
+    its rating/roster changes (callers of recalc_team_skill do it after committing).
+    """
+    rows = (db.session.query(Team.id, Team.name, Team.color, Team.sport, Team.skill_rating, func.count(Player.id))
+            .outerjoin(Player, Player.team_id == Team.id)
+            .group_by(Team.id)
+            .order_by(Team.name)
+            .all())
+    return [
+        {"id": tid, "name": name, "color": color, "sport": sport, "skill_rating": rating, "player_count": n}
+        for tid, name, color, sport, rating, n in rows
+    ]
+
+def invalidate_team_caches(*team_ids):
+    """
+    Drop cached views built from teams/players: the memoized team listing, the
+    page fragments of the given teams, and (by bumping the roster version in
+    their key) cached match page fragments.
+    """
+    cache.delete_memoized(list_teams)
+    cache.delete_many(*(f"team:{tid}" for tid in team_ids if tid))
+    cache.set("roster:version", (cache.get("roster:version") or 0) + 1, timeout=0)
+
+def _match_fragment_key(match):
+    """
+    Cache key for a rendered match page body. It changes whenever anything the
+    body shows changes: the match row itself, its assignments, or any
+    roster/player (roster version). Assignments are keyed on their content, a
+    digest of the ordered (player_id, team_side) pairs: ids can't be used since
+    rebalancing deletes and re-inserts rows (SQLite reuses the rowids) and the
+    assign upsert moves players between sides in place.
+    """
+    pairs = (db.session.query(MatchAssignment.player_id, MatchAssignment.team_side)
+             .filter(MatchAssignment.match_id == match.id)
+             .order_by(MatchAssignment.player_id).all())
+    digest = hashlib.blake2b(repr([tuple(p) for p in pairs]).encode(), digest_size=8).hexdigest()
+    return (f"match:{match.id}:{int(match.status)}:{match.team1_id}:{match.team2_id}:{match.stakes}:"
+            f"{match.sport}:{match.location}:{digest}:{cache.get('roster:version') or 0}")
+
+def _conditional_page(body, template, **context):
+    """
+    Wrap a rendered page body in its layout template with an ETag of the body,
+    answering 304 when the client already holds it. Responses that carry a
+    flashed message get no ETag so a later 304 can't replay a stale message.
+    """
+    if "_flashes" in session:
+        return render_template(template, body=Markup(body), **context)
+    etag = hashlib.md5(body.encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        resp = app.response_class(status=304)
+    else:
+        resp = make_response(render_template(template, body=Markup(body), **context))
+    resp.set_etag(etag)
+    resp.cache_control.no_cache = True
+    return resp
 
 # Home
 @app.route("/")
 def index():
-    teams = Team.query.order_by(Team.name).all()
-    matches = Match.query.order_by(Match.created_at.desc()).all()
-    open_matches = [m for m in matches if (not m.team1_id) or (not m.team2_id)]
-    return render_template("index.html", teams=teams, matches=matches, open_matches=open_matches)
+    teams = list_teams()
+    page = request.args.get("page", 1, type=int)
+    # eager-load m.team1/m.team2, which index.html reads, to avoid per-row lazy SELECTs;
+    # both match lists are bounded so the page cost doesn't grow with match history
+    matches_page = (Match.query.options(selectinload(Match.team1), selectinload(Match.team2))
+                    .order_by(Match.created_at.desc())
+                    .paginate(page=page, per_page=50, error_out=False))
+    open_matches = Match.query.filter(or_(Match.team1_id.is_(None), Match.team2_id.is_(None))).order_by(Match.created_at.desc()).limit(50).all()
+    return render_template("index.html", teams=teams, matches=matches_page.items, matches_page=matches_page, open_matches=open_matches)
 
 # -------------------------
 # Team creation & detail
@@ -102,34 +296,43 @@ def create_team():
         # sport from form (new). For backward compatibility, if not provided fallback to 'soccer'
         sport = request.form.get("sport") or "soccer"
 
+        # flush (not commit) between steps to get generated ids; one commit at the end
         team = Team(name=name, color=color, skill_rating=skill, sport=sport)
         db.session.add(team)
-        db.session.commit()
+        db.session.flush()
 
         if captain_name:
             captain = Player(name=captain_name, role="Captain", skill_rating=skill, team_id=team.id)
             db.session.add(captain)
-            db.session.commit()
+            db.session.flush()
             team.captain_id = captain.id
-            db.session.commit()
+        db.session.commit()
 
+        invalidate_team_caches()
         flash("Team created", "success")
         return redirect(url_for("index"))
     return render_template("create_team.html")
 
 @app.route("/teams/<int:team_id>")
 def team_detail(team_id):
-    team = Team.query.get_or_404(team_id)
-    # derive skill fields for this team's sport (for the add-player form)
-    skill_names = skill_fields_for_sport(team.sport)
-    # players (ordered)
-    players = team.players
-    return render_template("team_detail.html", team=team, players=players, skill_names=skill_names)
+    # page body is cached per team until invalidate_team_caches(team_id) runs on a write
+    key = f"team:{team_id}"
+    body = cache.get(key)
+    if body is None:
+        # the roster table reads every player's skills: 2 batched SELECTs instead of 1 per player
+        team = db.session.get(Team, team_id, options=[selectinload(Team.players).selectinload(Player.skills), *_strict_loading()]) or abort(404)
+        # derive skill fields for this team's sport (for the add-player form)
+        skill_names = skill_fields_for_sport(team.sport)
+        # players (ordered)
+        players = team.players
+        body = render_template("_team_detail_body.html", team=team, players=players, skill_names=skill_names)
+        cache.set(key, body)
+    return _conditional_page(body, "team_detail.html")
 
 # manual add player to team
 @app.route("/teams/<int:team_id>/add_player", methods=["POST"])
 def team_add_player(team_id):
-    team = Team.query.get_or_404(team_id)
+    team = db.get_or_404(Team, team_id)
     name = request.form.get("name")
     email = request.form.get("email") or None
     role = request.form.get("role") or None
@@ -139,109 +342,102 @@ def team_add_player(team_id):
         flash("Player name required", "danger")
         return redirect(url_for("team_detail", team_id=team_id))
 
-    # create player
-    p = Player(name=name, email=email, role=role, skill_rating=skill, team_id=team.id, invited=False)
-    db.session.add(p)
-    db.session.commit()
+    # create player; RETURNING hands back the new id without a separate flush/commit
+    player_id = db.session.execute(
+        insert(Player).returning(Player.id),
+        {"name": name, "email": email, "role": role, "skill_rating": skill, "team_id": team.id, "invited": False},
+    ).scalar_one()
 
     # extract skill_* fields from form and store as PlayerSkill rows
     # expected form inputs: skill_Shooting, skill_Passing, etc.
-    skill_names = skill_fields_for_sport(team.sport)
-    any_skill_saved = False
-    canonical_keys = {f"skill_{sn.replace(' ','_')}" for sn in skill_names}
-    for sname in skill_names:
-        key = f"skill_{sname.replace(' ','_')}"
-        val = request.form.get(key)
-        if val is None or val == "":
-            continue
-        try:
-            v = int(val)
-        except Exception:
-            # ignore invalid entries
-            continue
-        ps = PlayerSkill(player_id=p.id, sport=(team.sport.lower() if team.sport else "unknown"), name=sname, value=v)
-        db.session.add(ps)
-        any_skill_saved = True
-
-    # Also support arbitrary skill_ fields not in the canonical set
-    for key in request.form:
-        if key.startswith("skill_") and key not in canonical_keys:
-            v_raw = request.form.get(key)
-            if v_raw is None or v_raw == "":
-                continue
-            try:
-                v = int(v_raw)
-            except Exception:
-                continue
-            # name from key after skill_
-            name_from_key = key[len("skill_"):].replace("_", " ")
-            ps = PlayerSkill(player_id=p.id, sport=(team.sport.lower() if team.sport else "unknown"), name=name_from_key, value=v)
-            db.session.add(ps)
-            any_skill_saved = True
-
+    sport_lower = team.sport.lower() if team.sport else "unknown"
+    skill_rows = [{"player_id": player_id, "sport": sport_lower, "name": sname, "value": v}
+                  for sname, v in parse_skill_form(request.form, team.sport)]
+
+    # plain mappings + one executemany INSERT: no ORM instances or unit-of-work bookkeeping
+    if skill_rows:
+        db.session.execute(insert(PlayerSkill), skill_rows)
+        adjust_team_skill_totals(team.id, sum(r["value"] for r in skill_rows), len(skill_rows))
     db.session.commit()
 
-    # Recalculate team skill rating now that player added
-    recalc_team_skill(team)
+    # Recalculate team skill rating now that player added (off the request path)
+    schedule_team_recalc(team.id)
 
     flash("Player added", "success")
     return redirect(url_for("team_detail", team_id=team_id))
 
+# -------------------------
+# Helper: sync a player's PlayerSkill rows to a new set
+# -------------------------
+def sync_player_skills(player_id, skill_rows):
+    """
+    Make the player's PlayerSkill rows match skill_rows (dicts with
+    player_id/sport/name/value), touching only the deltas: UPDATE rows whose
+    value or sport changed, INSERT new names, DELETE names no longer present.
+    Returns the (value sum, row count) change for adjust_team_skill_totals.
+    Does not commit.
+    """
+    existing = {}
+    stale = []  # (id, value)
+    for sid, sname, ssport, svalue in (db.session.query(PlayerSkill.id, PlayerSkill.name, PlayerSkill.sport, PlayerSkill.value)
+                                       .filter_by(player_id=player_id)):
+        if sname in existing:
+            stale.append((sid, svalue))  # duplicate name left over from older edits
+        else:
+            existing[sname] = (sid, ssport, svalue)
+
+    updates, inserts = [], []
+    delta_sum = 0
+    for row in skill_rows:
+        current = existing.pop(row["name"], None)
+        if current is None:
+            inserts.append(row)
+            delta_sum += row["value"]
+        elif current[1:] != (row["sport"], row["value"]):
+            updates.append({"id": current[0], "sport": row["sport"], "value": row["value"]})
+            delta_sum += row["value"] - current[2]
+    stale.extend((sid, svalue) for sid, _, svalue in existing.values())
+
+    if stale:
+        PlayerSkill.query.filter(PlayerSkill.id.in_([sid for sid, _ in stale])).delete(synchronize_session=False)
+        delta_sum -= sum(svalue for _, svalue in stale)
+    if updates:
+        db.session.execute(update(PlayerSkill), updates)  # executemany UPDATE by primary key
+    if inserts:
+        db.session.execute(insert(PlayerSkill), inserts)
+    return delta_sum, len(inserts) - len(stale)
+
 # route to edit player and their skills
 @app.route("/players/<int:player_id>/edit", methods=["GET", "POST"])
 def edit_player(player_id):
-    player = Player.query.get_or_404(player_id)
+    player = db.get_or_404(Player, player_id)
     team = player.team
     sport = team.sport if team else None
-    skill_names = skill_fields_for_sport(sport)
     if request.method == "POST":
         player.name = request.form.get("name") or player.name
         player.email = request.form.get("email") or player.email
         player.role = request.form.get("role") or player.role
         # optional: update legacy skill_rating if provided
-        try:
-            player.skill_rating = int(request.form.get("skill_rating") or player.skill_rating)
-        except Exception:
-            pass
+        skill_rating = _int_or_none(request.form.get("skill_rating"))
+        if skill_rating is not None:
+            player.skill_rating = skill_rating
         db.session.add(player)
-        db.session.commit()
 
-        # delete old PlayerSkill rows for this player and save new ones
-        PlayerSkill.query.filter_by(player_id=player.id).delete()
-        db.session.commit()
-
-        canonical_keys = {f"skill_{sn.replace(' ','_')}" for sn in skill_names}
-        for sname in skill_names:
-            key = f"skill_{sname.replace(' ','_')}"
-            val = request.form.get(key)
-            if val is None or val == "":
-                continue
-            try:
-                v = int(val)
-            except Exception:
-                continue
-            ps = PlayerSkill(player_id=player.id, sport=(sport.lower() if sport else "unknown"), name=sname, value=v)
-            db.session.add(ps)
-
-        # also save arbitrary skill_ fields
-        for key in request.form:
-            if key.startswith("skill_") and key not in canonical_keys:
-                v_raw = request.form.get(key)
-                if v_raw is None or v_raw == "":
-                    continue
-                try:
-                    v = int(v_raw)
-                except Exception:
-                    continue
-                name_from_key = key[len("skill_"):].replace("_", " ")
-                ps = PlayerSkill(player_id=player.id, sport=(sport.lower() if sport else "unknown"), name=name_from_key, value=v)
-                db.session.add(ps)
+        sport_lower = sport.lower() if sport else "unknown"
+        skill_rows = [{"player_id": player.id, "sport": sport_lower, "name": sname, "value": v}
+                      for sname, v in parse_skill_form(request.form, sport)]
 
+        # write only what changed against the stored skills (same transaction)
+        delta_sum, delta_count = sync_player_skills(player.id, skill_rows)
+        if team:
+            adjust_team_skill_totals(team.id, delta_sum, delta_count)
         db.session.commit()
 
-        # recalc team rating
+        # recalc team rating (off the request path)
         if team:
-            recalc_team_skill(team)
+            schedule_team_recalc(team.id)
+        else:
+            invalidate_team_caches()
 
         flash("Player updated", "success")
         if team:
@@ -251,47 +447,69 @@ def edit_player(player_id):
     # GET: render edit form
     # Prepare a dict of existing skill values for this player
     existing_skills = {s.name: s.value for s in player.skills}
+    skill_names = skill_fields_for_sport(sport)
     return render_template("edit_player.html", player=player, team=team, skill_names=skill_names, existing_skills=existing_skills)
 
 
 @app.route("/player/<int:player_id>/delete", methods=["POST", "GET"])
 def delete_player(player_id):
-    player = Player.query.get_or_404(player_id)
+    player = db.session.get(Player, player_id, options=[joinedload(Player.team)]) or abort(404)
     team = player.team
 
-    # Delete the player's skills first
-    PlayerSkill.query.filter_by(player_id=player.id).delete()
+    # Delete the player's skills first, taking their values off the team's totals
+    removed = db.session.execute(
+        delete(PlayerSkill).where(PlayerSkill.player_id == player.id)
+        .returning(PlayerSkill.value)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    if team:
+        adjust_team_skill_totals(team.id, -sum(removed), -len(removed))
 
     db.session.delete(player)
-    db.session.commit()
 
-    # Recalculate team's average after deletion using recalc_team_skill
+    # Recalculate team's average after deletion, in the same transaction
     if team:
-        try:
-            recalc_team_skill(team)
-        except Exception:
-            # if something odd happens, ensure team.skill_rating isn't left None
-            team.skill_rating = team.skill_rating or 1200
-            db.session.add(team)
-            db.session.commit()
+        db.session.flush()
+        recalc_team_skill(team)
+    db.session.commit()
+    invalidate_team_caches(team.id if team else None)
 
     flash(f"{player.name} has been deleted{(' from ' + team.name) if team else ''}.", "warning")
     if team:
         return redirect(url_for("team_detail", team_id=team.id))
     return redirect(url_for("index"))
 
+# -------------------------
+# Helper: create an Invite with a fresh unique token
+# -------------------------
+def create_invite(context_type, context_id, email=None, invited_name=None):
+    """
+    Insert an Invite in one statement. ON CONFLICT(token) DO NOTHING turns a
+    (very unlikely) token collision into an empty RETURNING, in which case we
+    retry with a new token instead of failing on the unique constraint.
+    """
+    while True:
+        stmt = (sqlite_insert(Invite)
+                # 16 random bytes (22 url-safe chars); Invite.token holds up to 120
+                .values(token=make_token(16), context_type=context_type, context_id=context_id,
+                        email=email, invited_name=invited_name)
+                .on_conflict_do_nothing(index_elements=["token"])
+                .returning(Invite))
+        inv = db.session.scalars(stmt).first()
+        if inv is not None:
+            db.session.commit()
+            return inv
+
 # invite player to a team (creates Invite row and shows a token / page)
 @app.route("/teams/<int:team_id>/invite", methods=["GET","POST"])
 def team_invite(team_id):
-    team = Team.query.get_or_404(team_id)
+    team = db.get_or_404(Team, team_id)
     if request.method == "POST":
         invited_name = request.form.get("name") or None
         email = request.form.get("email") or None
-        token = make_token(12)
-        inv = Invite(token=token, context_type="team", context_id=team.id, email=email, invited_name=invited_name)
-        db.session.add(inv); db.session.commit()
+        inv = create_invite("team", team.id, email=email, invited_name=invited_name)
         # In production you'd email the token link; for MVP we just display a page with the link
-        accept_url = url_for("accept_invite", token=token, _external=True)
+        accept_url = url_for("accept_invite", token=inv.token, _external=True)
         return render_template("invite_sent.html", invite=inv, accept_url=accept_url, team=team)
     return render_template("invite_sent.html", team=team, invite=None)
 
@@ -300,27 +518,27 @@ def team_invite(team_id):
 # -------------------------
 @app.route("/matches/create", methods=["GET","POST"])
 def create_match():
-    teams = Team.query.order_by(Team.name).all()
+    teams = list_teams()
     if request.method == "POST":
         sport = request.form.get("sport") or "soccer"
         location = request.form.get("location")
         date_raw = request.form.get("date") or None
-        team1_id = request.form.get("team1_id") or None
-        team2_id = request.form.get("team2_id") or None
+        # If teams were selected, convert to ints (once)
+        team1_id = _int_or_none(request.form.get("team1_id"))
+        team2_id = _int_or_none(request.form.get("team2_id"))
         stakes = float(request.form.get("stakes") or 0.0)
 
         m = Match(sport=sport, location=location, stakes=stakes)
 
-        # If teams were selected, convert to ints
-        if team1_id:
-            team1_id = int(team1_id)
-        if team2_id:
-            team2_id = int(team2_id)
-
         # Validate team sport compatibility if both teams provided
         if team1_id and team2_id:
-            team1 = Team.query.get(team1_id)
-            team2 = Team.query.get(team2_id)
+            # both teams in one query
+            teams_by_id = {t.id: t for t in Team.query.filter(Team.id.in_((team1_id, team2_id))).all()}
+            team1 = teams_by_id.get(team1_id)
+            team2 = teams_by_id.get(team2_id)
+            if not team1 or not team2:
+                flash("Cannot create match: unknown team selected.", "danger")
+                return redirect(url_for("create_match"))
             # If either team has no sport set (legacy), treat missing sport as equal to m.sport or to other team
             t1_sport = team1.sport or sport
             t2_sport = team2.sport or sport
@@ -331,9 +549,9 @@ def create_match():
             m.sport = t1_sport
 
         if team1_id:
-            m.team1_id = int(team1_id)
+            m.team1_id = team1_id
         if team2_id:
-            m.team2_id = int(team2_id)
+            m.team2_id = team2_id
         if date_raw:
             try:
                 m.date = datetime.fromisoformat(date_raw)
@@ -346,31 +564,33 @@ def create_match():
 
 @app.route("/matches/<int:match_id>")
 def match_detail(match_id):
-    match = Match.query.get_or_404(match_id)
-    # pool: players from team1 and team2 (if present), plus any standalone players
-    pool = []
-    if match.team1_id:
-        pool += Player.query.filter_by(team_id=match.team1_id).all()
-    if match.team2_id:
-        pool += Player.query.filter_by(team_id=match.team2_id).all()
-    # assigned players:
-    assignments = MatchAssignment.query.filter_by(match_id=match.id).all()
-    assigned_a = [a.player for a in assignments if a.team_side == 'A']
-    assigned_b = [a.player for a in assignments if a.team_side == 'B']
-    locked = (match.status == "locked")
-    return render_template("match_detail.html", match=match, pool=pool, assigned_a=assigned_a, assigned_b=assigned_b, locked=locked)
+    # team1/team2 are only read when the body is re-rendered, so leave them lazy
+    match = db.get_or_404(Match, match_id)
+    key = _match_fragment_key(match)
+    body = cache.get(key)
+    if body is None:
+        # pool: players from team1 and team2 (if present), plus any standalone players
+        pool = _match_pool(match, *_strict_loading())
+        # assigned players:
+        assignments = MatchAssignment.query.options(joinedload(MatchAssignment.player)).filter_by(match_id=match.id).all()
+        assigned_a = [a.player for a in assignments if a.team_side == 'A']
+        assigned_b = [a.player for a in assignments if a.team_side == 'B']
+        locked = (match.status == MatchStatus.LOCKED)
+        body = render_template("_match_detail_body.html", match=match, pool=pool, assigned_a=assigned_a, assigned_b=assigned_b, locked=locked)
+        cache.set(key, body)
+    return _conditional_page(body, "match_detail.html", match=match)
 
 # invite team to match (creates Invite linking to match)
 @app.route("/matches/<int:match_id>/invite_team", methods=["POST"])
 def invite_team_to_match(match_id):
-    match = Match.query.get_or_404(match_id)
+    # only the id is needed, so probe for the match instead of loading it
+    if not db.session.query(exists().where(Match.id == match_id)).scalar():
+        abort(404)
     team_id = request.form.get("team_id")
-    token = make_token(12)
-    inv = Invite(token=token, context_type="match", context_id=match.id, email=None, invited_name=None)
-    db.session.add(inv); db.session.commit()
-    accept_url = url_for("accept_invite", token=token, _external=True)
+    inv = create_invite("match", match_id)
+    accept_url = url_for("accept_invite", token=inv.token, _external=True)
     flash(f"Invite created. Share this link to accept: {accept_url}", "info")
-    return redirect(url_for("match_detail", match_id=match.id))
+    return redirect(url_for("match_detail", match_id=match_id))
 
 # accept invite via token (either join team or accept match invite)
 @app.route("/invite/<token>", methods=["GET","POST"])
@@ -382,25 +602,25 @@ def accept_invite(token):
         email = request.form.get("email") or None
         if inv.context_type == "team":
             # add player into the team
-            p = Player(name=name or inv.invited_name or "Guest", email=email, invited=False, team_id=inv.context_id)
-            db.session.add(p); db.session.commit()
-            inv.accepted = True; db.session.commit()
-            flash("You joined the team!", "success")
-            # recalc team rating (no skills from invite accepted player until they edit)
-            try:
-                team = Team.query.get(inv.context_id)
+            db.session.execute(insert(Player), {"name": name or inv.invited_name or "Guest", "email": email, "invited": False, "team_id": inv.context_id})
+            inv.accepted = True
+            # recalc team rating (no skills from invite accepted player until they edit), same transaction
+            team = db.session.get(Team, inv.context_id)
+            if team:
                 recalc_team_skill(team)
-            except Exception:
-                pass
+            db.session.commit()
+            invalidate_team_caches(inv.context_id)
+            flash("You joined the team!", "success")
             return redirect(url_for("team_detail", team_id=inv.context_id))
         else:
             # match invite - join as a player assigned to match pool (we create a player w/o team)
-            p = Player(name=name or "Guest", email=email, invited=False, team_id=None)
-            db.session.add(p); db.session.commit()
+            new_id = db.session.execute(
+                insert(Player).returning(Player.id),
+                {"name": name or "Guest", "email": email, "invited": False, "team_id": None},
+            ).scalar_one()
             # create assignment on the match (unassigned side: 'A' or 'B' chosen later)
             # For simplicity, add assignment with team_side = 'A' by default (captain can reassign)
-            ma = MatchAssignment(match_id=inv.context_id, player_id=p.id, team_side='A')
-            db.session.add(ma)
+            db.session.execute(insert(MatchAssignment), {"match_id": inv.context_id, "player_id": new_id, "team_side": 'A'})
             inv.accepted = True; db.session.commit()
             flash("You joined the match pool!", "success")
             return redirect(url_for("match_detail", match_id=inv.context_id))
@@ -410,15 +630,24 @@ def accept_invite(token):
 # open challenge join (team fills a blank slot)
 @app.route("/matches/<int:match_id>/join/<int:team_id>", methods=["POST"])
 def join_open_match(match_id, team_id):
-    match = Match.query.get_or_404(match_id)
-    if match.status == "locked":
-        flash("Match is locked", "danger"); return redirect(url_for("match_detail", match_id=match_id))
-    if not match.team1_id:
-        match.team1_id = team_id
-    elif not match.team2_id:
-        match.team2_id = team_id
+    # claim the first open slot with a conditional UPDATE: no load/flush, and two
+    # concurrent joins can't both take the same slot
+    for slot in (Match.team1_id, Match.team2_id):
+        claimed = db.session.execute(
+            update(Match)
+            .where(Match.id == match_id, Match.status != MatchStatus.LOCKED, slot.is_(None))
+            .values({slot: team_id})
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed:
+            break
     else:
-        flash("Both slots filled", "danger")
+        # nothing updated: find out why (missing match -> 404)
+        match = db.get_or_404(Match, match_id)
+        if match.status == MatchStatus.LOCKED:
+            flash("Match is locked", "danger")
+        else:
+            flash("Both slots filled", "danger")
         return redirect(url_for("match_detail", match_id=match_id))
     db.session.commit()
     flash("Team joined the match", "success")
@@ -429,78 +658,66 @@ def join_open_match(match_id, team_id):
 # -------------------------
 @app.route("/matches/<int:match_id>/auto_balance", methods=["POST"])
 def match_auto_balance(match_id):
-    match = Match.query.get_or_404(match_id)
-    if match.status == "locked":
+    match = db.get_or_404(Match, match_id)
+    if match.status == MatchStatus.LOCKED:
         return jsonify({"error": "match locked"}), 400
-    pool = []
-    if match.team1_id:
-        pool += Player.query.filter_by(team_id=match.team1_id).all()
-    if match.team2_id:
-        pool += Player.query.filter_by(team_id=match.team2_id).all()
-    if not pool:
-        pool = Player.query.all()
+    pool = _rebalance_pool(match)
     team_a, team_b = balance_teams(pool)
-    # remove old assignments for match
-    MatchAssignment.query.filter_by(match_id=match.id).delete()
-    db.session.commit()
-    for p in team_a:
-        db.session.add(MatchAssignment(match_id=match.id, player_id=p.id, team_side='A'))
-    for p in team_b:
-        db.session.add(MatchAssignment(match_id=match.id, player_id=p.id, team_side='B'))
+    # replace old assignments for match: one DELETE + one executemany INSERT, one commit
+    MatchAssignment.query.filter_by(match_id=match.id).delete(synchronize_session=False)
+    rows = [{"match_id": match.id, "player_id": p.id, "team_side": 'A'} for p in team_a] + \
+           [{"match_id": match.id, "player_id": p.id, "team_side": 'B'} for p in team_b]
+    if rows:
+        db.session.execute(insert(MatchAssignment), rows)
     db.session.commit()
     return jsonify({"team_a":[p.name for p in team_a],"team_b":[p.name for p in team_b]})
 
 @app.route("/matches/<int:match_id>/shuffle", methods=["POST"])
 def match_shuffle(match_id):
-    match = Match.query.get_or_404(match_id)
-    if match.status == "locked": return jsonify({"error":"match locked"}), 400
-    pool = []
-    if match.team1_id:
-        pool += Player.query.filter_by(team_id=match.team1_id).all()
-    if match.team2_id:
-        pool += Player.query.filter_by(team_id=match.team2_id).all()
-    if not pool:
-        pool = Player.query.all()
+    match = db.get_or_404(Match, match_id)
+    if match.status == MatchStatus.LOCKED: return jsonify({"error":"match locked"}), 400
+    pool = _rebalance_pool(match)
     a, b = shuffle_players_list(pool)
-    MatchAssignment.query.filter_by(match_id=match.id).delete()
-    db.session.commit()
-    for p in a:
-        db.session.add(MatchAssignment(match_id=match.id, player_id=p.id, team_side='A'))
-    for p in b:
-        db.session.add(MatchAssignment(match_id=match.id, player_id=p.id, team_side='B'))
+    MatchAssignment.query.filter_by(match_id=match.id).delete(synchronize_session=False)
+    rows = [{"match_id": match.id, "player_id": p.id, "team_side": 'A'} for p in a] + \
+           [{"match_id": match.id, "player_id": p.id, "team_side": 'B'} for p in b]
+    if rows:
+        db.session.execute(insert(MatchAssignment), rows)
     db.session.commit()
     return jsonify({"team_a":[p.name for p in a],"team_b":[p.name for p in b]})
 
 @app.route("/matches/<int:match_id>/toggle_lock", methods=["POST"])
 def match_toggle_lock(match_id):
-    match = Match.query.get_or_404(match_id)
+    match = db.get_or_404(Match, match_id)
     # require at least one assignment to lock
-    if match.status == "locked":
-        match.status = "pending"
+    if match.status == MatchStatus.LOCKED:
+        match.status = MatchStatus.PENDING
     else:
-        if not MatchAssignment.query.filter_by(match_id=match.id).count():
+        has_any = db.session.query(exists().where(MatchAssignment.match_id == match.id)).scalar()
+        if not has_any:
             return jsonify({"error":"no assignments to lock"}), 400
-        match.status = "locked"
+        match.status = MatchStatus.LOCKED
     db.session.commit()
-    return jsonify({"status":match.status})
+    return jsonify({"status":match.status.label})
 
 # manual assignment (AJAX POST) - assign/remove players to side
 @app.route("/matches/<int:match_id>/assign", methods=["POST"])
 def match_assign_player(match_id):
-    match = Match.query.get_or_404(match_id)
-    if match.status == "locked":
+    match = db.get_or_404(Match, match_id)
+    if match.status == MatchStatus.LOCKED:
         return jsonify({"error":"match locked"}), 400
     player_id = int(request.form.get("player_id"))
     side = request.form.get("team_side")  # 'A' or 'B', or 'remove'
     if request.form.get("remove") == "1" or side == "remove":
-        MatchAssignment.query.filter_by(match_id=match.id, player_id=player_id).delete()
+        MatchAssignment.query.filter_by(match_id=match.id, player_id=player_id).delete(synchronize_session=False)
         db.session.commit()
         return jsonify({"ok":True})
-    # remove existing then add
-    MatchAssignment.query.filter_by(match_id=match.id, player_id=player_id).delete()
-    db.session.commit()
-    ma = MatchAssignment(match_id=match.id, player_id=player_id, team_side=side)
-    db.session.add(ma); db.session.commit()
+    # add, or move to the other side if already assigned: one statement, one commit
+    # (an in-place side change still changes _match_fragment_key, which digests the sides)
+    stmt = (sqlite_insert(MatchAssignment)
+            .values(match_id=match.id, player_id=player_id, team_side=side)
+            .on_conflict_do_update(index_elements=["match_id", "player_id"], set_={"team_side": side}))
+    db.session.execute(stmt); db.session.commit()
     return jsonify({"ok":True})
 
 # -------------------------
@@ -529,7 +746,7 @@ def admin_required_check(player_id=None):
         return True
     # If player_id provided, check DB
     if player_id:
-        p = Player.query.get(player_id)
+        p = db.session.get(Player, player_id)
         if p and getattr(p, "is_admin", False):
             return True
     return False
@@ -578,7 +795,7 @@ def admin_update_settings():
 def admin_add_stakes(match_id):
     if not admin_required_check():
         return jsonify({"error":"admin required"}), 403
-    match = Match.query.get_or_404(match_id)
+    match = db.get_or_404(Match, match_id)
     amount = float(request.form.get("amount") or 0.0)
     match.stakes = (match.stakes or 0.0) + amount
     db.session.add(match)
@@ -596,7 +813,7 @@ def admin_approve_result(match_id):
     if not admin_required_check():
         return jsonify({"error":"admin required"}), 403
 
-    match = Match.query.get_or_404(match_id)
+    match = db.get_or_404(Match, match_id)
     winning_side = request.form.get("winning_side")
     note = request.form.get("note") or ""
     settings = get_admin_settings()
@@ -615,7 +832,7 @@ def admin_approve_result(match_id):
     losers = [a.player for a in assignments if a.team_side != winning_side]
 
     # mark match as completed and save admin note in status (or extended storage)
-    match.status = "completed"
+    match.status = MatchStatus.COMPLETED
     db.session.add(match)
     db.session.commit()
 
@@ -628,7 +845,7 @@ def admin_approve_result(match_id):
 
 @app.route("/matches/<int:match_id>/dispute", methods=["GET","POST"])
 def submit_dispute(match_id):
-    match = Match.query.get_or_404(match_id)
+    match = db.get_or_404(Match, match_id)
     if request.method == "POST":
         # For MVP, require 'filed_by_id' and 'reason' from the form
         filed_by_id = request.form.get("filed_by_id")
@@ -636,7 +853,7 @@ def submit_dispute(match_id):
         if not filed_by_id or not reason:
             flash("You must provide your player id and a reason", "danger")
             return redirect(url_for("match_detail", match_id=match.id))
-        filed_by = Player.query.get(int(filed_by_id))
+        filed_by = db.session.get(Player, int(filed_by_id))
         if not filed_by:
             flash("Invalid filing player id", "danger")
             return redirect(url_for("match_detail", match_id=match.id))
@@ -653,14 +870,14 @@ def submit_dispute(match_id):
 def admin_view_dispute(dispute_id):
     if not admin_required_check():
         return "admin required", 403
-    d = Dispute.query.get_or_404(dispute_id)
+    d = db.get_or_404(Dispute, dispute_id)
     return render_template("dispute_detail.html", dispute=d)
 
 @app.route("/admin/disputes/<int:dispute_id>/resolve", methods=["POST"])
 def admin_resolve_dispute(dispute_id):
     if not admin_required_check():
         return jsonify({"error":"admin required"}), 403
-    d = Dispute.query.get_or_404(dispute_id)
+    d = db.get_or_404(Dispute, dispute_id)
     action = request.form.get("action")  # 'approve', 'dismiss', 'void_match'
     resolution_text = request.form.get("resolution") or ""
     if action == "approve":
@@ -677,7 +894,7 @@ def admin_resolve_dispute(dispute_id):
         d.resolution = resolution_text or "Admin voided the match."
         # void the match: set status to 'void' and optionally refund stakes
         m = d.match
-        m.status = "void"
+        m.status = MatchStatus.VOID
         db.session.add(m)
         flash("Match voided", "warning")
     else:
@@ -864,7 +1081,7 @@ def update_player_stats(player_id):
 
 @app.route("/player/<int:player_id>")
 def view_player(player_id):
-    player = Player.query.get(player_id)
+    player = db.session.get(Player, player_id)
 
     stats = {
         "wins": player.wins,
@@ -883,11 +1100,11 @@ def player_stats(player_id):
     from app import db
     from app.ai_recommendations import update_skill_rating, generate_ai_recommendations
 
-    player = Player.query.get(player_id)
+    player = db.session.get(Player, player_id)
     if not player:
         abort(404, description="Player not found")
 
-    team = Team.query.get(player.team_id) if player.team_id else None
+    team = db.session.get(Team, player.team_id) if player.team_id else None
 
     # --- Compute average skill ---
     if hasattr(player, "skills") and player.skills:
@@ -908,6 +1125,7 @@ def player_stats(player_id):
     # --- Update player’s skill dynamically ---
     new_rating = update_skill_rating(player, wins, total_matches)
     db.session.commit()
+    invalidate_team_caches(player.team_id)
 
     # --- Prepare stats object for AI ---
     stats_obj = {
@@ -950,7 +1168,7 @@ def dashboard():
 
 @app.route("/admin/match/<int:match_id>/set_result", methods=["POST"])
 def admin_set_match_result(match_id):
-    match = Match.query.get_or_404(match_id)
+    match = db.get_or_404(Match, match_id)
     winner_team_id = request.form.get("winner_team_id")
 
     if not winner_team_id:
@@ -958,11 +1176,11 @@ def admin_set_match_result(match_id):
         return redirect(url_for("admin_dashboard"))
 
     winner_team_id = int(winner_team_id)
-    winner_team = Team.query.get(winner_team_id)
+    winner_team = db.session.get(Team, winner_team_id)
     loser_team = match.team1 if match.team2_id == winner_team_id else match.team2
 
     # Update match result
-    match.status = "completed"
+    match.status = MatchStatus.COMPLETED
     match.winner_team_id = winner_team_id
 
     # Update team stats
@@ -973,6 +1191,7 @@ def admin_set_match_result(match_id):
     loser_team.matches_lost = (loser_team.matches_lost or 0) + 1
 
     db.session.commit()
+    invalidate_team_caches(winner_team.id, loser_team.id)
     flash(f"Match result updated: {winner_team.name} won!", "success")
     return redirect(url_for("admin_dashboard"))
 
@@ -981,7 +1200,7 @@ def admin_set_match_result(match_id):
 def admin_update_player_stats(player_id):
     from .models import Player, PlayerStats, db
 
-    player = Player.query.get_or_404(player_id)
+    player = db.get_or_404(Player, player_id)
     stats = PlayerStats.query.filter_by(player_id=player_id).first()
     if not stats:
         stats = PlayerStats(player_id=player.id, sport=player.role or "Unknown")
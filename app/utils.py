@@ -5,7 +5,8 @@ import string
 import secrets
 
 def make_token(n=10):
-    return secrets.token_urlsafe(n)[:n]
+    # n random bytes, url-safe encoded (about 1.3 chars per byte); not truncated
+    return secrets.token_urlsafe(n)
 
 def shuffle_players_list(players):
     p = list(players)
@@ -0,0 +1,57 @@
+"""
+Shared app for the test modules. Routes register on the first app created
+(they bind through current_app at import), so every module uses this one,
+backed by a temporary SQLite file instead of instance/sports.db.
+"""
+import atexit
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+
+_app = None
+
+
+def get_app():
+    global _app
+    if _app is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        _app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmpdir.name, "test.db"),
+        })
+
+        def _cleanup(app=_app):
+            with app.app_context():
+                db.engine.dispose()
+            tmpdir.cleanup()
+        atexit.register(_cleanup)
+    return _app
+
+
+def settle_recalcs():
+    """Wait for the background team rating recalculations to finish."""
+    from app import routes
+    for future in list(routes._pending_recalcs.values()):
+        future.result()
+
+
+@contextmanager
+def count_queries(engine):
+    """Collect the SQL of every statement run on engine inside the block."""
+    queries = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
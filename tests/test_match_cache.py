@@ -0,0 +1,89 @@
+"""
+The match page body is cached; after every assignment write the next GET must
+show the sides as they are in the database, not a stale cached body.
+"""
+import re
+import unittest
+
+from support import get_app, settle_recalcs
+
+from app import db
+from app.models import Team, Match, MatchAssignment
+
+app = None
+match_id = None
+
+_SIDE_LIST = re.compile(r'<ul id="team-(a|b)-list"[^>]*>(.*?)</ul>', re.S)
+_PLAYER_ID = re.compile(r'data-player-id="(\d+)"')
+
+
+def setUpModule():
+    global app, match_id
+    app = get_app()
+    client = app.test_client()
+    for name in ("Cache Red", "Cache Blue"):
+        client.post("/teams/create", data={"name": name, "captain_name": f"{name} Cap", "sport": "soccer"})
+    with app.app_context():
+        red, blue = (Team.query.filter_by(name=n).one().id for n in ("Cache Red", "Cache Blue"))
+    for team, prefix in ((red, "R"), (blue, "B")):
+        for i in range(3):
+            client.post(f"/teams/{team}/add_player", data={"name": f"{prefix}{i}", "skill_Shooting": str(40 + i)})
+    settle_recalcs()
+    with app.app_context():
+        match = Match(sport="soccer", team1_id=red, team2_id=blue)
+        db.session.add(match)
+        db.session.commit()
+        match_id = match.id
+
+
+class MatchPageCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+
+    def db_sides(self):
+        with app.app_context():
+            rows = MatchAssignment.query.filter_by(match_id=match_id).all()
+            return ({r.player_id for r in rows if r.team_side == "A"},
+                    {r.player_id for r in rows if r.team_side == "B"})
+
+    def page_sides(self):
+        html = self.client.get(f"/matches/{match_id}").get_data(as_text=True)
+        lists = {side: {int(pid) for pid in _PLAYER_ID.findall(body)} for side, body in _SIDE_LIST.findall(html)}
+        return lists["a"], lists["b"]
+
+    def test_shuffle_and_balance_show_current_sides(self):
+        for endpoint in ("shuffle", "shuffle", "auto_balance", "shuffle", "shuffle"):
+            before = self.page_sides()  # page is cached before each rebalance
+            etag = self.client.get(f"/matches/{match_id}").headers["ETag"]
+            resp = self.client.post(f"/matches/{match_id}/{endpoint}")
+            self.assertEqual(resp.status_code, 200)
+            if self.db_sides() != before:
+                # the browser's conditional reload must not be told its old copy is current
+                resp = self.client.get(f"/matches/{match_id}", headers={"If-None-Match": etag})
+                self.assertEqual(resp.status_code, 200)
+            self.assertEqual(self.page_sides(), self.db_sides())
+
+    def test_swapping_two_players_between_sides(self):
+        # the assign upsert moves players in place: counts and ids end up where they started
+        with app.app_context():
+            match = db.session.get(Match, match_id)
+            swap = Match(sport="soccer", team1_id=match.team1_id, team2_id=match.team2_id)
+            db.session.add(swap)
+            db.session.commit()
+            swap_id = swap.id
+            x, y = (p.id for p in match.team1.players[:2])
+        self.client.post(f"/matches/{swap_id}/assign", data={"player_id": x, "team_side": "A"})
+        self.client.post(f"/matches/{swap_id}/assign", data={"player_id": y, "team_side": "B"})
+        etag = self.client.get(f"/matches/{swap_id}").headers["ETag"]
+
+        self.client.post(f"/matches/{swap_id}/assign", data={"player_id": x, "team_side": "B"})
+        self.client.post(f"/matches/{swap_id}/assign", data={"player_id": y, "team_side": "A"})
+        resp = self.client.get(f"/matches/{swap_id}", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 200)
+        html = resp.get_data(as_text=True)
+        lists = {side: {int(pid) for pid in _PLAYER_ID.findall(body)} for side, body in _SIDE_LIST.findall(html)}
+        self.assertEqual((lists["a"], lists["b"]), ({y}, {x}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Query budgets for the read-heavy pages, so a template or loop that starts
+touching an unloaded relationship (N+1) fails here instead of in production.
+Every budget is measured with several rows of the kind being listed present,
+so a per-row query would push it over.
+"""
+import unittest
+
+from support import get_app, settle_recalcs, count_queries
+
+from app import db, cache
+from app.models import Team, Player, Match
+
+app = None
+team_id = None
+bare_team_id = None
+match_id = None
+
+
+def setUpModule():
+    global app, team_id, bare_team_id, match_id
+    app = get_app()
+    client = app.test_client()
+    for name in ("Budget Alpha", "Budget Beta", "Budget Bare"):
+        client.post("/teams/create", data={"name": name, "captain_name": f"{name} Cap", "sport": "soccer"})
+    with app.app_context():
+        team_id, beta_id, bare_team_id = (Team.query.filter_by(name=n).one().id
+                                          for n in ("Budget Alpha", "Budget Beta", "Budget Bare"))
+    for team in (team_id, beta_id):
+        for i in range(5):
+            client.post(f"/teams/{team}/add_player", data={"name": f"P{team}-{i}", "skill_Shooting": "50", "skill_Passing": "60"})
+    # let the background rating recalcs finish before measuring
+    settle_recalcs()
+    with app.app_context():
+        # distinct opponents, so lazily loading match.team2 would cost a query per match
+        opponents = [Team(name=f"Budget Opp {i}", sport="soccer") for i in range(6)]
+        # players from outside the match's teams: not in the pool, so not in the identity map
+        loaners = [Player(name=f"Loaner {i}") for i in range(3)]
+        db.session.add_all(opponents + loaners)
+        db.session.flush()
+        matches = [Match(sport="soccer", team1_id=team_id, team2_id=beta_id)]
+        matches += [Match(sport="soccer", team1_id=team_id, team2_id=opp.id) for opp in opponents]
+        matches += [Match(sport="soccer", team1_id=team_id) for _ in range(2)]  # open challenges
+        db.session.add_all(matches)
+        db.session.commit()
+        match_id = matches[0].id
+        loaner_ids = [p.id for p in loaners]
+    client.post(f"/matches/{match_id}/auto_balance")
+    for pid in loaner_ids:
+        client.post(f"/matches/{match_id}/assign", data={"player_id": pid, "team_side": "B"})
+
+
+class QueryBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        with app.app_context():
+            cache.clear()
+            self.engine = db.engine
+
+    def test_index(self):
+        # teams, match page + its count, team1/team2 selectinloads, open matches
+        with count_queries(self.engine) as queries:
+            resp = self.client.get("/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertLessEqual(len(queries), 6, queries)
+
+    def test_team_detail_uncached(self):
+        with count_queries(self.engine) as queries:
+            resp = self.client.get(f"/teams/{team_id}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertLessEqual(len(queries), 3, queries)
+
+    def test_team_detail_cached(self):
+        self.client.get(f"/teams/{team_id}")
+        with count_queries(self.engine) as queries:
+            resp = self.client.get(f"/teams/{team_id}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(queries), 0, queries)
+
+    def test_match_detail_uncached(self):
+        # match, cache key, pool, assignments + players, team1, team2
+        with count_queries(self.engine) as queries:
+            resp = self.client.get(f"/matches/{match_id}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertLessEqual(len(queries), 6, queries)
+
+    def test_match_detail_cached(self):
+        # match and cache key only
+        self.client.get(f"/matches/{match_id}")
+        with count_queries(self.engine) as queries:
+            resp = self.client.get(f"/matches/{match_id}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertLessEqual(len(queries), 2, queries)
+
+    def test_recalc_team_skill(self):
+        from app.routes import recalc_team_skill  # routes only import once an app exists
+        with app.app_context():
+            team = db.session.get(Team, team_id)
+            with count_queries(self.engine) as queries:
+                recalc_team_skill(team)
+            self.assertEqual(len(queries), 1, queries)  # running totals, no aggregate
+
+            bare = db.session.get(Team, bare_team_id)
+            with count_queries(self.engine) as queries:
+                recalc_team_skill(bare)
+            self.assertLessEqual(len(queries), 2, queries)  # totals + player-rating fallback
+            db.session.rollback()
+
+
+if __name__ == "__main__":
+    unittest.main()